@@ -1,61 +1,54 @@
 # 3d.py
-import simpy
-import random
 import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
 import pandas as pd
 import plotly.graph_objects as go
-import math
+from des_kernel import SEED, draw_students, mmc_start_times
+from charts import histogram_chart
 
 # ============================
 # DISCRETE EVENT SIMULATION
 # ============================
-def run_des(num_students, arrival_rate, service_time, servers):
-    env = simpy.Environment()
-    counter = simpy.Resource(env, capacity=servers)
-    students = []
-
-    def student(env, sid, counter, service_time):
-        arrival = env.now
-        service_dur = random.expovariate(1.0 / service_time)
-        with counter.request() as req:
-            yield req
-            start = env.now
-            yield env.timeout(service_dur)
-            end = env.now
-        students.append({
-            "id": sid,
-            "arrival": arrival,
-            "start": start,
-            "end": end,
-            "wait": start - arrival,
-            "service": service_dur,
-            "system": end - arrival
-        })
-
-    def arrival_process(env, counter):
-        for i in range(num_students):
-            yield env.timeout(random.expovariate(1.0 / arrival_rate))
-            env.process(student(env, i, counter, service_time))
-
-    env.process(arrival_process(env, counter))
-    env.run()
-    return sorted(students, key=lambda x: x["id"])
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_des_fast(num_students, arrival_rate, service_time, servers, seed=SEED):
+    arrival_a, service_a = draw_students(num_students, arrival_rate, service_time, seed)
+    start_a = mmc_start_times(arrival_a, service_a, servers)
+    end_a = start_a + service_a
+    return arrival_a, start_a, end_a, start_a - arrival_a, service_a, end_a - arrival_a
 
 # ============================
 # CONTINUOUS SIMULATION (M/M/c)
 # ============================
+def _erlang_b(a, servers):
+    # Erlang-B in log space: log(a**i / i!) for i = 0..k, normalised with a
+    # log-sum-exp so large k never overflows
+    log_terms = np.concatenate(([0.0], np.cumsum(np.log(a) - np.log(np.arange(1, servers + 1)))))
+    peak = log_terms.max()
+    log_norm = peak + np.log(np.exp(log_terms - peak).sum())
+    return float(np.exp(log_terms[-1] - log_norm))
+
+# Erlang-B unrolled (Horner form) for the 1-5 counters the sliders allow
+_ERLANG_B_TABLE = (
+    lambda a: a / (1 + a),
+    lambda a: a**2 / (2 + a*(2 + a)),
+    lambda a: a**3 / (6 + a*(6 + a*(3 + a))),
+    lambda a: a**4 / (24 + a*(24 + a*(12 + a*(4 + a)))),
+    lambda a: a**5 / (120 + a*(120 + a*(60 + a*(20 + a*(5 + a))))),
+)
+
+@st.cache_data(show_spinner=False, max_entries=32)
 def run_cs(arrival_rate, service_rate, servers):
     rho = arrival_rate / (servers * service_rate)
     if rho >= 1:
         return None
 
-    sum_terms = sum((arrival_rate / service_rate) ** n / math.factorial(n) for n in range(servers))
-    last_term = ((arrival_rate / service_rate) ** servers / math.factorial(servers)) * (1 / (1 - rho))
-    p0 = 1 / (sum_terms + last_term)
-
-    pw = last_term * p0
+    # Erlang-C from Erlang-B (no factorials / big powers)
+    a = arrival_rate / service_rate
+    if servers <= len(_ERLANG_B_TABLE):
+        erlang_b = _ERLANG_B_TABLE[servers - 1](a)
+    else:
+        erlang_b = _erlang_b(a, servers)
+    pw = erlang_b / (1 - rho * (1 - erlang_b))
     Lq = (pw * rho) / (1 - rho)
     Wq = Lq / arrival_rate
     W = Wq + 1 / service_rate
@@ -74,30 +67,51 @@ def run_cs(arrival_rate, service_rate, servers):
 # ============================
 # 3D VISUALIZATION (DES)
 # ============================
-def build_3d(students, servers):
-    counter_xs = [i * 3 for i in range(servers)]
+@st.cache_data(show_spinner=False, max_entries=32)
+def build_3d(wait_a, service_a, end_a, servers, max_students=500, labeled_students=10):
+    counter_xs = np.arange(servers) * 3
     waiting_x = -5
-    done_x = max(counter_xs) + 5
-
-    xs, ys, zs, colors, texts = [], [], [], [], []
-    for i, s in enumerate(students):
-        if s["wait"] > 0:
-            xs.append(waiting_x); ys.append(-i*0.2); zs.append(0)
-            colors.append("blue")
-            texts.append(f"Student {s['id']}<br>Waiting {s['wait']:.2f}m")
-        xs.append(counter_xs[i % servers]); ys.append(0); zs.append(0)
-        colors.append("red")
-        texts.append(f"Student {s['id']}<br>Served {s['service']:.2f}m")
-        xs.append(done_x); ys.append(i*0.1); zs.append(0)
-        colors.append("green")
-        texts.append(f"Student {s['id']}<br>Done at {s['end']:.2f}m")
-
-    fig = go.Figure(data=[go.Scatter3d(
-        x=xs, y=ys, z=zs,
-        mode="markers",
-        marker=dict(size=5, color=colors),
-        text=texts, hoverinfo="text"
-    )])
+    done_x = counter_xs.max() + 5
+
+    def stage_points(ids):
+        # waiting (only if the student queued), served and done markers for ids
+        waiting = ids[wait_a[ids] > 0]
+        nw, ns = len(waiting), len(ids)
+        xs = np.concatenate((np.full(nw, waiting_x), counter_xs[ids % servers], np.full(ns, done_x)))
+        ys = np.concatenate((-waiting * 0.2, np.zeros(ns), ids * 0.1))
+        colors = ["blue"] * nw + ["red"] * ns + ["green"] * ns
+        return waiting, xs, ys, np.zeros(len(xs)), colors
+
+    # bulk trace: evenly spaced subsample, no per-point hover text
+    ids = np.arange(len(wait_a))
+    if len(ids) > max_students:
+        ids = np.linspace(0, len(ids) - 1, max_students, dtype=int)
+    _, xs, ys, zs, colors = stage_points(ids)
+
+    # labeled overlay: shortest and longest wait plus an even spread of students
+    picks = np.unique(np.concatenate((
+        [wait_a.argmin(), wait_a.argmax()],
+        np.linspace(0, len(wait_a) - 1, labeled_students, dtype=int)
+    )))
+    waiting, lxs, lys, lzs, lcolors = stage_points(picks)
+    texts = ([f"Student {i}<br>Waiting {w:.2f}m" for i, w in zip(waiting, wait_a[waiting])]
+             + [f"Student {i}<br>Served {s:.2f}m" for i, s in zip(picks, service_a[picks])]
+             + [f"Student {i}<br>Done at {e:.2f}m" for i, e in zip(picks, end_a[picks])])
+
+    fig = go.Figure(data=[
+        go.Scatter3d(
+            x=xs, y=ys, z=zs,
+            mode="markers",
+            marker=dict(size=3, color=colors),
+            hoverinfo="skip", showlegend=False
+        ),
+        go.Scatter3d(
+            x=lxs, y=lys, z=lzs,
+            mode="markers",
+            marker=dict(size=6, color=lcolors, line=dict(color="black", width=1)),
+            text=texts, hoverinfo="text", showlegend=False
+        )
+    ])
     fig.update_layout(scene=dict(
         xaxis_title="Flow (X)", yaxis_title="Students (Y)", zaxis_title="Z"
     ))
@@ -117,12 +131,12 @@ servers = st.sidebar.slider("Service Counters", 1, 5, 2)
 
 if st.button("▶ Run Simulation"):
     # Run DES
-    students = run_des(num_students, arrival_rate, service_time, servers)
-    wait_times = [s["wait"] for s in students]
-    avg_wait = np.mean(wait_times)
-    max_wait = np.max(wait_times)
-    sim_end = max(s["end"] for s in students)
-    total_service = sum(s["service"] for s in students)
+    arrival_a, start_a, end_a, wait_a, service_a, system_a = run_des_fast(
+        num_students, arrival_rate, service_time, servers)
+    avg_wait = wait_a.mean()
+    max_wait = wait_a.max()
+    sim_end = end_a.max()
+    total_service = service_a.sum()
     des_utilization = total_service / (servers * sim_end)
     throughput = num_students / (sim_end + 1)
 
@@ -130,72 +144,60 @@ if st.button("▶ Run Simulation"):
     service_rate = 1 / service_time
     cs_result = run_cs(1/arrival_rate, service_rate, servers)
 
+    # Format every metric once; the columns and the table below share these,
+    # so both use the table's short units (min, stud/min)
+    des_fmt = {
+        "avg": f"{avg_wait:.2f} min",
+        "max": f"{max_wait:.2f} min",
+        "util": f"{des_utilization*100:.1f}%",
+        "tput": f"{throughput:.2f} stud/min"
+    }
+    if cs_result:
+        cs_fmt = {
+            "avg": f"{cs_result['Wq']:.2f} min",
+            "max": f"{cs_result['Wq'] * 3:.2f} min",
+            "util": f"{cs_result['rho']*100:.1f}%",
+            "tput": f"{cs_result['Throughput']:.2f} stud/min"
+        }
+    else:
+        cs_fmt = dict.fromkeys(des_fmt, "System Unstable")
+
     # Layout
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("📌 Discrete-Event Simulation (DES)")
-        st.write(f"**Avg Wait Time:** {avg_wait:.2f} mins")
-        st.write(f"**Max Wait Time:** {max_wait:.2f} mins")
-        st.write(f"**Utilization:** {des_utilization*100:.1f}%")
-        st.write(f"**Throughput:** {throughput:.2f} students/min")
+        st.write(f"**Avg Wait Time:** {des_fmt['avg']}")
+        st.write(f"**Max Wait Time:** {des_fmt['max']}")
+        st.write(f"**Utilization:** {des_fmt['util']}")
+        st.write(f"**Throughput:** {des_fmt['tput']}")
 
         # DES histogram
-        fig, ax = plt.subplots()
-        ax.hist(wait_times, bins=20, color="skyblue", edgecolor="black")
-        ax.set_title("DES Wait Times")
-        ax.set_xlabel("Minutes"); ax.set_ylabel("Students")
-        st.pyplot(fig)
+        st.caption("DES Wait Times")
+        histogram_chart(wait_a, "Minutes", "Students", "#87CEEB")
 
     with col2:
         st.subheader("📌 Continuous Simulation (CS)")
         if cs_result:
-            cs_max_wait = cs_result['Wq'] * 3
-            st.write(f"**Expected Avg Wait (Wq):** {cs_result['Wq']:.2f} mins")
-            st.write(f"**Approx. Max Wait:** {cs_max_wait:.2f} mins")
-            st.write(f"**Utilization (ρ):** {cs_result['rho']*100:.1f}%")
-            st.write(f"**Throughput:** {cs_result['Throughput']:.2f} students/min")
-
-            # Synthetic histogram for CS
-            synthetic_waits = np.random.exponential(cs_result['Wq'], num_students)
-            fig2, ax2 = plt.subplots()
-            ax2.hist(synthetic_waits, bins=20, color="salmon", edgecolor="black")
-            ax2.set_title("CS Wait Times (Synthetic)")
-            ax2.set_xlabel("Minutes"); ax2.set_ylabel("Students")
-            st.pyplot(fig2)
+            st.write(f"**Expected Avg Wait (Wq):** {cs_fmt['avg']}")
+            st.write(f"**Approx. Max Wait:** {cs_fmt['max']}")
+            st.write(f"**Utilization (ρ):** {cs_fmt['util']}")
+            st.write(f"**Throughput:** {cs_fmt['tput']}")
+
+            # Synthetic histogram for CS; own stream so it isn't the DES draws rescaled
+            synthetic_waits = np.random.default_rng([SEED, 1]).exponential(cs_result['Wq'], num_students)
+            st.caption("CS Wait Times (Synthetic)")
+            histogram_chart(synthetic_waits, "Minutes", "Students", "#FA8072")
 
     # Comparative Table
     st.subheader("📊 Comparative Analysis")
-    if cs_result:
-        cs_max_wait = cs_result['Wq'] * 3
-        data = {
-            "Metric": ["Avg Wait", "Max Wait", "Utilization", "Throughput"],
-            "DES": [
-                f"{avg_wait:.2f} min",
-                f"{max_wait:.2f} min",
-                f"{des_utilization*100:.1f}%",
-                f"{throughput:.2f} stud/min"
-            ],
-            "CS": [
-                f"{cs_result['Wq']:.2f} min",
-                f"{cs_max_wait:.2f} min",
-                f"{cs_result['rho']*100:.1f}%",
-                f"{cs_result['Throughput']:.2f} stud/min"
-            ]
-        }
-    else:
-        data = {
-            "Metric": ["Avg Wait", "Max Wait", "Utilization", "Throughput"],
-            "DES": [
-                f"{avg_wait:.2f} min",
-                f"{max_wait:.2f} min",
-                f"{des_utilization*100:.1f}%",
-                f"{throughput:.2f} stud/min"
-            ],
-            "CS": ["System Unstable"]*4
-        }
+    data = {
+        "Metric": ["Avg Wait", "Max Wait", "Utilization", "Throughput"],
+        "DES": list(des_fmt.values()),
+        "CS": list(cs_fmt.values())
+    }
 
     st.table(pd.DataFrame(data))
 
     # 3D Viz
     st.subheader("🌀 3D Visualization (DES)")
-    st.plotly_chart(build_3d(students, servers), use_container_width=True)
\ No newline at end of file
+    st.plotly_chart(build_3d(wait_a, service_a, end_a, servers), use_container_width=True)
\ No newline at end of file
@@ -1,45 +1,30 @@
-import simpy
-import random
 import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
 import pandas as pd
+from des_kernel import SEED, draw_students, mmc_start_times, sweep_waits, euler_queue
+from charts import histogram_chart
 
 # ======================================
 #  DISCRETE EVENT SIMULATION (DES)
 # ======================================
-def student(env, name, counter, service_time, wait_times):
-    arrival = env.now
-    with counter.request() as req:
-        yield req
-        wait = env.now - arrival
-        wait_times.append(wait)
-        yield env.timeout(random.expovariate(1.0 / service_time))
-
-def run_discrete(num_students, arrival_rate, service_time, servers):
-    env = simpy.Environment()
-    counter = simpy.Resource(env, capacity=servers)
-    wait_times = []
-
-    def arrival_process(env, counter):
-        for i in range(num_students):
-            yield env.timeout(random.expovariate(1.0 / arrival_rate))
-            env.process(student(env, f"Student {i}", counter, service_time, wait_times))
-
-    env.process(arrival_process(env, counter))
-    env.run()
-    return wait_times
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_discrete_fast(num_students, arrival_rate, service_time, servers, seed=SEED):
+    arrivals, service_durs = draw_students(num_students, arrival_rate, service_time, seed)
+    return mmc_start_times(arrivals, service_durs, servers) - arrivals
+
+# avg/max DES wait per counter count, every scenario on the same student draws
+@st.cache_data(show_spinner=False, max_entries=32)
+def run_scenarios(num_students, arrival_rate, service_time, servers_list, seed=SEED):
+    arrivals, service_durs = draw_students(num_students, arrival_rate, service_time, seed)
+    return sweep_waits(arrivals, service_durs, np.asarray(servers_list, dtype=np.int64))
 
 # ======================================
 #  CONTINUOUS SIMULATION (CS)
 # ======================================
+@st.cache_data(show_spinner=False, max_entries=32)
 def run_continuous(total_time, dt, inflow_rate, service_rate):
     times = np.arange(0, total_time, dt)
-    queue = [0]
-
-    for t in times[1:]:
-        dq = inflow_rate - service_rate * queue[-1]
-        queue.append(max(queue[-1] + dq * dt, 0))
+    queue = euler_queue(len(times), float(dt), float(inflow_rate), float(service_rate))
     return times, queue
 
 # ======================================
@@ -95,7 +80,7 @@ total_time = st.sidebar.slider("Simulation Time (Continuous)", 50, 200, 100)
 # -------------------------------
 # Run Simulations
 # -------------------------------
-des_wait_times = run_discrete(num_students, arrival_rate, service_time, servers)
+des_wait_times = run_discrete_fast(num_students, arrival_rate, service_time, servers)
 times, queue = run_continuous(total_time, 1, 1/arrival_rate, 1/service_time)
 
 # -------------------------------
@@ -107,23 +92,16 @@ with col1:
     st.subheader("📌 Discrete Event Simulation (DES)")
     st.write(f"**Average Waiting Time:** {np.mean(des_wait_times):.2f} minutes")
     st.write(f"**Maximum Waiting Time:** {np.max(des_wait_times):.2f} minutes")
-    fig, ax = plt.subplots()
-    ax.hist(des_wait_times, bins=20, color="skyblue", edgecolor="black")
-    ax.set_title("Waiting Time Distribution (DES)")
-    ax.set_xlabel("Wait Time (minutes)")
-    ax.set_ylabel("Number of Students")
-    st.pyplot(fig)
+    st.caption("Waiting Time Distribution (DES)")
+    histogram_chart(des_wait_times, "Wait Time (minutes)", "Number of Students", "#87CEEB")
 
 with col2:
     st.subheader("📌 Continuous Simulation (CS)")
     st.write(f"**Final Queue Length:** {queue[-1]:.2f} students")
     st.write(f"**Average Queue Length:** {np.mean(queue):.2f} students")
-    fig, ax = plt.subplots()
-    ax.plot(times, queue, color="orange")
-    ax.set_title("Queue Length Over Time (CS)")
-    ax.set_xlabel("Time (minutes)")
-    ax.set_ylabel("Queue Length")
-    st.pyplot(fig)
+    st.caption("Queue Length Over Time (CS)")
+    st.line_chart(pd.DataFrame({"Queue Length": queue}, index=pd.Index(times, name="Time (minutes)")),
+                  color="#FFA500")
 
 # -------------------------------
 # Tabular Comparative Analysis
@@ -151,24 +129,15 @@ st.table(df)
 st.markdown("---")
 st.subheader("📈 Scenario Comparison: Varying Number of Counters")
 
-scenario_results = []
-for s in [1, 2, 3]:
-    des_times = run_discrete(num_students, arrival_rate, service_time, s)
-    scenario_results.append({
-        "Servers": s,
-        "DES Avg Wait Time (mins)": np.mean(des_times),
-        "DES Max Wait Time (mins)": np.max(des_times)
-    })
-
-scenario_df = pd.DataFrame(scenario_results)
+scenario_servers = (1, 2, 3)
+scenario_stats = run_scenarios(num_students, arrival_rate, service_time, scenario_servers)
+scenario_df = pd.DataFrame(
+    scenario_stats,
+    index=pd.Index(scenario_servers, name="Servers"),
+    columns=["DES Avg Wait Time (mins)", "DES Max Wait Time (mins)"]
+)
 st.dataframe(scenario_df, use_container_width=True)
 
-fig, ax = plt.subplots()
-ax.plot(scenario_df["Servers"], scenario_df["DES Avg Wait Time (mins)"], marker="o", label="Avg Wait Time")
-ax.plot(scenario_df["Servers"], scenario_df["DES Max Wait Time (mins)"], marker="s", label="Max Wait Time")
-ax.set_title("Impact of Number of Counters on DES Wait Times")
-ax.set_xlabel("Number of Service Counters")
-ax.set_ylabel("Waiting Time (minutes)")
-ax.legend()
-st.pyplot(fig)
+st.caption("Impact of Number of Counters on DES Wait Times")
+st.line_chart(scenario_df)
 
@@ -0,0 +1,17 @@
+# charts.py
+# Streamlit chart helpers shared by the apps.
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+def histogram_chart(values, x_title, y_title, color, bins=20):
+    # bars span the real bin edges, so narrow bins never collapse into one label
+    counts, edges = np.histogram(values, bins=bins)
+    st.vega_lite_chart(pd.DataFrame({"start": edges[:-1], "end": edges[1:], "count": counts}), {
+        "mark": {"type": "bar", "color": color},
+        "encoding": {
+            "x": {"field": "start", "type": "quantitative", "bin": {"binned": True}, "title": x_title},
+            "x2": {"field": "end"},
+            "y": {"field": "count", "type": "quantitative", "title": y_title}
+        }
+    }, width="stretch")
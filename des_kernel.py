@@ -0,0 +1,56 @@
+# des_kernel.py
+# Numba kernels shared by the apps: the M/M/c discrete-event simulation and
+# the continuous-simulation queue integration.
+# cache=True keeps the compiled machine code in __pycache__, so only the very
+# first import pays the JIT cost; later app restarts just load it.
+import numpy as np
+from numba import njit
+
+# every simulation seeds its own Generator from this instead of drawing from
+# global random state, so cached reruns are reproducible
+SEED = 42
+
+def draw_students(num_students, arrival_rate, service_time, seed=SEED):
+    rng = np.random.default_rng(seed)
+    interarrivals = rng.exponential(arrival_rate, num_students)
+    service_durs = rng.exponential(service_time, num_students)
+    return np.cumsum(interarrivals), service_durs
+
+@njit(cache=True)
+def mmc_start_times(arrivals, services, servers):
+    # FIFO M/M/c: each student takes whichever counter frees up first
+    n = len(arrivals)
+    start = np.empty(n)
+    free_at = np.zeros(servers)
+    for i in range(n):
+        k = np.argmin(free_at)
+        start[i] = arrivals[i] if arrivals[i] > free_at[k] else free_at[k]
+        free_at[k] = start[i] + services[i]
+    return start
+
+@njit(cache=True)
+def sweep_waits(arrivals, services, servers_list):
+    # a serial loop: each scenario is microseconds of work, so threads only add
+    # overhead (and some threading layers hang at exit off the main thread)
+    out = np.empty((len(servers_list), 2))
+    for k in range(len(servers_list)):
+        wait = mmc_start_times(arrivals, services, servers_list[k]) - arrivals
+        out[k, 0] = wait.mean()
+        out[k, 1] = wait.max()
+    return out
+
+@njit(cache=True, fastmath=True)
+def euler_queue(n, dt, inflow_rate, service_rate):
+    # explicit Euler steps of dq/dt = inflow - service_rate * q, floored at 0
+    queue = np.empty(n)
+    queue[0] = 0.0
+    for i in range(1, n):
+        q = queue[i - 1] + (inflow_rate - service_rate * queue[i - 1]) * dt
+        queue[i] = q if q > 0 else 0.0
+    return queue
+
+# load (or compile) every kernel at import so no Streamlit rerun waits on them;
+# this module is imported once per process, unlike the rerun-executed scripts
+mmc_start_times(np.zeros(1), np.zeros(1), 1)
+sweep_waits(np.zeros(1), np.zeros(1), np.ones(1, dtype=np.int64))
+euler_queue(2, 1.0, 0.0, 0.0)
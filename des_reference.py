@@ -0,0 +1,53 @@
+# des_reference.py
+# SimPy reference for the M/M/c simulation. The apps never import this; run
+#   python des_reference.py
+# to check that des_kernel's fast path matches SimPy event-for-event.
+import sys
+import simpy
+import numpy as np
+from des_kernel import SEED, draw_students, mmc_start_times
+
+def run_des(num_students, arrival_rate, service_time, servers, seed=SEED):
+    env = simpy.Environment()
+    counter = simpy.Resource(env, capacity=servers)
+    arrival_a, start_a = np.empty(num_students), np.empty(num_students)
+
+    # same draws, in the same order, as des_kernel.draw_students
+    rng = np.random.default_rng(seed)
+    interarrivals = rng.exponential(arrival_rate, num_students)
+    service_durs = rng.exponential(service_time, num_students)
+
+    def student(env, sid, counter, service_dur):
+        arrival_a[sid] = env.now
+        with counter.request() as req:
+            yield req
+            start_a[sid] = env.now
+            yield env.timeout(service_dur)
+
+    def arrival_process(env, counter):
+        timeout, process = env.timeout, env.process
+        for i, (gap, svc) in enumerate(zip(interarrivals.tolist(), service_durs.tolist())):
+            yield timeout(gap)
+            process(student(env, i, counter, svc))
+
+    env.process(arrival_process(env, counter))
+    env.run()
+    return arrival_a, start_a
+
+def validate(seed=SEED):
+    # every combination the app sliders allow
+    worst = 0.0
+    for num_students in range(50, 501, 50):
+        for arrival_rate in range(1, 11):
+            for service_time in range(1, 11):
+                arrivals, service_durs = draw_students(num_students, arrival_rate, service_time, seed)
+                for servers in range(1, 6):
+                    ref_arrivals, ref_start = run_des(num_students, arrival_rate, service_time, servers, seed)
+                    start = mmc_start_times(arrivals, service_durs, servers)
+                    worst = max(worst, np.abs(arrivals - ref_arrivals).max(), np.abs(start - ref_start).max())
+    return worst
+
+if __name__ == "__main__":
+    worst = validate()
+    print(f"max |fast - SimPy| over all slider settings: {worst:.3g} min")
+    sys.exit(0 if worst < 1e-6 else 1)